@@ -35,6 +35,7 @@ import json
 
 # Import configuration
 from config import Config
+from operations.config import TIME_SORTED_PARQUET_SUFFIX
 
 
 # ==========================================
@@ -688,6 +689,19 @@ class DataAnalysisEngine:
                 outputs["csv"] = output_csv
                 if verbose:
                     print(f"  💾 CSV saved: {output_csv.name}")
+                
+                # Parquet copy sorted on TIME, so time slices can read just the matching row groups.
+                # Optional: the CSV is already saved, so a failure here does not fail the aggregation
+                output_parquet = output_csv.with_name(output_csv.stem + TIME_SORTED_PARQUET_SUFFIX)
+                try:
+                    time_labels = final['TIME'] if 'TIME' in final.columns else final['time_bin_datetime'].dt.strftime('%H:%M')
+                    final[csv_columns].assign(TIME=time_labels).sort_values('TIME', kind='stable').to_parquet(
+                        output_parquet, index=False, row_group_size=100_000
+                    )
+                    outputs["parquet"] = output_parquet
+                except Exception as e:
+                    output_parquet.unlink(missing_ok=True)
+                    print(f"  ⚠️ Warning: TIME-sorted Parquet copy not written: {e}")
             
             # Save shapefile if requested
             if params["output_shapefile"]:
@@ -3,7 +3,10 @@ Base Operation Class
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Any, Optional, List, Tuple
+import threading
+import time
 import streamlit as st
 import pandas as pd
 import logging
@@ -11,6 +14,21 @@ from operations.column_name_mapping import to_camel_case, COLUMN_NAME_MAPPING
 
 _logger = logging.getLogger("base_operation")
 
+# Worker threads for operations that run outside the Streamlit script thread
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="operation")
+
+# Jobs still running, by (operation key, input file): (params, future, start time).
+# Shared by all sessions so a rerun or second click joins the job instead of starting another
+_IN_FLIGHT: Dict[Tuple[str, Any], Tuple[Dict[str, Any], Future, float]] = {}
+_IN_FLIGHT_LOCK = threading.RLock()
+
+
+def _forget_job(job_key: Tuple[str, Any], future: Future) -> None:
+    """Drop a finished job from _IN_FLIGHT (unless a newer job already took its key)"""
+    with _IN_FLIGHT_LOCK:
+        if job_key in _IN_FLIGHT and _IN_FLIGHT[job_key][1] is future:
+            del _IN_FLIGHT[job_key]
+
 
 class DataSourceHelper:
     """Helper methods for handling data source selection and column mapping"""
@@ -173,6 +191,10 @@ class DataSourceHelper:
 class BaseOperation(ABC):
     """Base class for all data operations"""
     
+    # Operations whose execute() makes no Streamlit calls can set this to run
+    # on a worker thread while the page shows live progress
+    run_in_background = False
+    
     def __init__(self):
         self.metadata = self.get_metadata()
     
@@ -215,12 +237,74 @@ class BaseOperation(ABC):
         
         params = self.render_ui()
         if params is not None:
-            with st.spinner(f"Running {self.metadata['title']}..."):
-                result = self.execute(**params)
-                
-                if result.get('success'):
-                    st.success("✅ Operation completed successfully!")
-                    if 'output_path' in result:
-                        st.info(f"📁 Output file: {result['output_path']}")
-                else:
-                    st.error(f"❌ Error: {result.get('error', 'Unknown error')}")
+            if self.run_in_background:
+                result = self._execute_in_background(params)
+            else:
+                with st.spinner(f"Running {self.metadata['title']}..."):
+                    result = self.execute(**params)
+            
+            if result.get('success'):
+                st.success("✅ Operation completed successfully!")
+                if result.get('output_path'):
+                    st.info(f"📁 Output file: {result['output_path']}")
+                if result.get('unmatched_times'):
+                    matched = result.get('filtered_count', 0)
+                    no_file = "" if result.get('output_path') else ", no output file written"
+                    st.warning(
+                        f"⚠️ No rows for: {', '.join(result['unmatched_times'])} "
+                        f"({matched:,} matching rows{no_file})"
+                    )
+            else:
+                st.error(f"❌ Error: {result.get('error', 'Unknown error')}")
+    
+    def _execute_in_background(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run execute() on a worker thread, updating a status box until it finishes
+        
+        Args:
+            params: Parameters returned by render_ui()
+            
+        Returns:
+            Result dict from execute()
+        """
+        title = self.metadata['title']
+        job_key = (self.metadata['key'], params.get('input_file'))
+        
+        with _IN_FLIGHT_LOCK:
+            running = _IN_FLIGHT.get(job_key)
+            if running is None:
+                future = _EXECUTOR.submit(self.execute, **params)
+                start_time = time.time()
+                _IN_FLIGHT[job_key] = (params, future, start_time)
+                future.add_done_callback(lambda f: _forget_job(job_key, f))
+            else:
+                running_params, future, start_time = running
+                try:
+                    same_params = bool(running_params == params)
+                except (TypeError, ValueError):
+                    same_params = False
+                if not same_params:
+                    return {
+                        "success": False,
+                        "error": f"{title} is already running on this input with other settings; "
+                                 f"wait for it to finish"
+                    }
+        
+        if running is not None:
+            # Same job started by an earlier click or session: wait for its result
+            _logger.info(f"{job_key[0]} joining job already running on {job_key[1]}")
+            st.info(f"⏳ {title} is already running with these settings, showing its result")
+        
+        with st.status(f"Running {title}...", expanded=False) as status:
+            while not future.done():
+                time.sleep(0.2)
+                status.update(label=f"Running {title}... ({time.time() - start_time:.0f}s)")
+            
+            result = future.result()
+            elapsed = time.time() - start_time
+            if result.get('success'):
+                status.update(label=f"{title} finished in {elapsed:.1f}s", state="complete")
+            else:
+                status.update(label=f"{title} failed after {elapsed:.1f}s", state="error")
+        
+        return result
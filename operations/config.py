@@ -6,7 +6,6 @@ Centralized settings that are shared across all operations
 from typing import Dict, List
 import os
 from pathlib import Path
-import geopandas as gpd
 
 
 # ==========================================
@@ -70,9 +69,9 @@ def _get_shapefile_fields(shapefile_key: str) -> List[str]:
         if not shp_files:
             return ["OBJECTID"]
         
-        # Read shapefile and get columns (excluding geometry)
-        gdf = gpd.read_file(shp_files[0])
-        fields = [col for col in gdf.columns if col != 'geometry']
+        # Field names come from the layer metadata (no features are read)
+        import pyogrio
+        fields = [str(col) for col in pyogrio.read_info(shp_files[0])['fields']]
         
         return fields if fields else ["OBJECTID"]
     except:
@@ -179,6 +178,10 @@ TIME_BINS = {
 
 DEFAULT_TIME_BIN = "30 min"
 
+# Selectbox options, built once at import instead of on every rerun
+TIME_BIN_OPTIONS = list(TIME_BINS.keys())
+DEFAULT_TIME_BIN_INDEX = TIME_BIN_OPTIONS.index(DEFAULT_TIME_BIN)
+
 
 # ==========================================
 # Output Format Configuration
@@ -187,6 +190,26 @@ DEFAULT_TIME_BIN = "30 min"
 OUTPUT_FORMATS = ["csv", "shapefile"]
 DEFAULT_OUTPUT_FORMAT = "csv"
 
+# Formats for operations that output plain tables (no geometry)
+TABLE_OUTPUT_FORMATS = ["csv", "parquet"]
+
+# Formats for operations that can join results to zone geometries
+SPATIAL_OUTPUT_FORMATS = ["csv", "shapefile", "geoparquet", "fgb"]
+
+
+# ==========================================
+# Large File Processing
+# ==========================================
+
+# CSV inputs larger than this are processed in chunks instead of loaded whole
+LARGE_FILE_THRESHOLD_MB = 500
+
+# Rows per chunk when reading large CSV inputs
+CSV_CHUNK_SIZE = 500_000
+
+# Copy of an aggregated CSV sorted on TIME, written next to it by the analysis engine
+TIME_SORTED_PARQUET_SUFFIX = '.time_sorted.parquet'
+
 
 # ==========================================
 # Endpoint/Target Field Configuration
@@ -198,6 +221,8 @@ ENDPOINT_OPTIONS = {
     "all": "All (Origin + Destination)"
 }
 
+ENDPOINT_KEYS = list(ENDPOINT_OPTIONS.keys())
+
 # Filter field options (for filtering operations)
 FILTER_FIELD_OPTIONS = {
     "all": "All Points",
@@ -51,11 +51,10 @@ class BoundaryFilterOperation(BaseOperation):
         
         if data_source_type == "aggregated":
             # Get aggregated files
-            aggregated_files = utils.get_aggregated_files()
-            if not aggregated_files:
+            file_options = utils.get_aggregated_file_options()
+            if not file_options:
                 st.warning("⚠️ No aggregated files found. Please run an analysis first.")
                 return None
-            file_options = {f.name: str(f) for f in aggregated_files}
             
             st.markdown("### Configuration")
             col1, col2 = st.columns(2)
@@ -30,13 +30,11 @@ class HourFilterOperation(BaseOperation):
     def render_ui(self) -> Optional[Dict[str, Any]]:
         """Render UI and return params if Run clicked"""
         
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first to generate aggregated files.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
         
         col1, col2 = st.columns(2)
@@ -71,12 +71,11 @@ class TimeSpaceFilterOperation(BaseOperation):
         
         if data_source_type == "aggregated":
             # Show aggregated files
-            aggregated_files = utils.get_aggregated_files()
-            if not aggregated_files:
+            file_options = utils.get_aggregated_file_options()
+            if not file_options:
                 st.warning("⚠️ No aggregated files found. Please run an analysis first.")
                 return None
             
-            file_options = {f.name: str(f) for f in aggregated_files}
             selected_file_name = st.selectbox("Input file:", options=list(file_options.keys()))
             selected_aggregated_file = file_options[selected_file_name]
             
@@ -31,13 +31,11 @@ class ODMatrixOperation(BaseOperation):
     def render_ui(self) -> Optional[Dict[str, Any]]:
         """Render UI"""
         
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         st.markdown("### Configuration")
         
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
@@ -12,7 +12,7 @@ from pathlib import Path
 from operations.base import BaseOperation
 from operations.config import (
     BOUNDARY_SOURCES, get_shapefile_fields, get_default_field,
-    ENDPOINT_OPTIONS, AGGREGATION_LEVELS, get_aggregation_fields_for_endpoint
+    ENDPOINT_OPTIONS, ENDPOINT_KEYS, AGGREGATION_LEVELS, get_aggregation_fields_for_endpoint
 )
 from ui_helpers import utils
 from config import Config
@@ -55,11 +55,10 @@ class ShapefileJoinOperation(BaseOperation):
         preview_df = None
         
         if data_source_type == "aggregated":
-            aggregated_files = utils.get_aggregated_files()
-            if not aggregated_files:
+            file_options = utils.get_aggregated_file_options()
+            if not file_options:
                 st.warning("⚠️ No aggregated files found. Please run an analysis first.")
                 return None
-            file_options = {f.name: str(f) for f in aggregated_files}
             
             st.markdown("### Configuration")
             selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
@@ -122,7 +121,7 @@ class ShapefileJoinOperation(BaseOperation):
             selected_file = None  # Will use filtered files instead
             
             # For raw data, we need endpoint selection
-            endpoint = st.selectbox("Target field:", options=list(ENDPOINT_OPTIONS.keys()),
+            endpoint = st.selectbox("Target field:", options=ENDPOINT_KEYS,
                                    format_func=lambda x: ENDPOINT_OPTIONS[x])
         
         # For aggregated files with manual column selection, set default endpoint
@@ -28,13 +28,11 @@ class SpatialAggOperation(BaseOperation):
     def render_ui(self) -> Optional[Dict[str, Any]]:
         """Render UI and return params if Run clicked"""
         
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         st.markdown("### Configuration")
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
         
@@ -8,7 +8,7 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 from operations.base import BaseOperation, DataSourceHelper
-from operations.config import GRID_SIZES, DEFAULT_GRID_SIZE, TIME_BINS, DEFAULT_TIME_BIN, ENDPOINT_OPTIONS
+from operations.config import GRID_SIZES, DEFAULT_GRID_SIZE, TIME_BINS, TIME_BIN_OPTIONS, DEFAULT_TIME_BIN_INDEX
 from ui_helpers import utils
 
 _logger = logging.getLogger("spatiotemporal_agg")
@@ -17,6 +17,8 @@ _logger = logging.getLogger("spatiotemporal_agg")
 class SpatiotemporalAggOperation(BaseOperation):
     """Aggregate by space and time"""
     
+    run_in_background = True
+    
     def get_metadata(self) -> Dict[str, str]:
         return {
             'key': 'spatiotemporal_agg',
@@ -28,19 +30,17 @@ class SpatiotemporalAggOperation(BaseOperation):
     def render_ui(self) -> Optional[Dict[str, Any]]:
         """Render UI and return params if Run clicked"""
         
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         st.markdown("### Configuration")
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
         
         # Load file preview for column selection
         try:
-            preview_df = pd.read_csv(file_options[selected_file], nrows=5)
+            preview_df = utils.get_file_preview(file_options[selected_file], n_rows=5)
             
             # Coordinate column selection
             lat_col, lon_col = DataSourceHelper.render_coordinate_selector(preview_df)
@@ -70,8 +70,8 @@ class SpatiotemporalAggOperation(BaseOperation):
                                     index=list(GRID_SIZES.keys()).index(DEFAULT_GRID_SIZE))
         with col2:
             time_bin = st.selectbox("Time bin:", 
-                                   options=list(TIME_BINS.keys()),
-                                   index=list(TIME_BINS.keys()).index(DEFAULT_TIME_BIN))
+                                   options=TIME_BIN_OPTIONS,
+                                   index=DEFAULT_TIME_BIN_INDEX)
         
         # Aggregation field selection
         st.markdown("### Aggregation Settings")
@@ -110,51 +110,52 @@ class SpatiotemporalAggOperation(BaseOperation):
         
         try:
             _logger.info(f"spatiotemporal_agg start input={input_file}")
-            df = pd.read_csv(input_file)
+            header = pd.read_csv(input_file, nrows=0)
             
             # Get coordinate columns
             lat_col, lon_col = DataSourceHelper.get_coordinate_columns(
-                df, endpoint='all', manual_lat=manual_lat_col, manual_lon=manual_lon_col
+                header, endpoint='all', manual_lat=manual_lat_col, manual_lon=manual_lon_col
             )
             
             if not lat_col or not lon_col:
                 return {"success": False, "error": "Coordinate columns not found"}
             
             # Check time column
-            if time_col not in df.columns:
+            if time_col not in header.columns:
                 return {"success": False, "error": f"Time column '{time_col}' not found"}
             
-            df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-            df = df[df[time_col].notna()].copy()
+            # Only load the columns the aggregation uses
+            agg_cols = [f for f in aggregation_fields if f in header.columns]
+            usecols = list(dict.fromkeys([lat_col, lon_col, time_col] + agg_cols))
+            df = utils.read_csv_fast(input_file, usecols=usecols)
+            
+            # Filter out invalid times without copying the frame
+            times = utils.parse_datetimes(df[time_col])
+            valid = times.notna()
             
-            if len(df) == 0:
+            if not valid.any():
                 return {"success": False, "error": "No valid time data found"}
             
             # Create spatial grid bins (using camelCase names)
             grid_deg = grid_size_meters / 111000.0
-            df['xBin'] = (df[lon_col] / grid_deg).astype('Int64')
-            df['yBin'] = (df[lat_col] / grid_deg).astype('Int64')
+            x_bin = (df.loc[valid, lon_col] / grid_deg).astype('Int64').rename('xBin')
+            y_bin = (df.loc[valid, lat_col] / grid_deg).astype('Int64').rename('yBin')
             
             # Create time bins (using camelCase names)
-            minutes = df[time_col].dt.hour * 60 + df[time_col].dt.minute
-            df['timeBinMinutes'] = (minutes // time_bin_minutes) * time_bin_minutes + time_bin_minutes
-            df['timeBinDatetime'] = pd.to_datetime(df[time_col].dt.date.astype(str)) + pd.to_timedelta(df['timeBinMinutes'], unit='m')
+            # Each record is labelled with the end of its bin
+            time_bin = utils.time_bin_ends(times[valid], time_bin_minutes).rename('timeBinDatetime')
+            bin_keys = [x_bin, y_bin, time_bin]
             
             # Determine aggregation strategy
-            if aggregation_fields:
-                # Aggregate selected fields
-                available_agg_fields = [f for f in aggregation_fields if f in df.columns]
-                if not available_agg_fields:
-                    _logger.warning("Selected aggregation fields not found, using count")
-                    df['count'] = 1
-                    agg = df.groupby(['xBin', 'yBin', 'timeBinDatetime'])['count'].sum().reset_index()
-                else:
-                    agg_dict = {field: 'sum' for field in available_agg_fields}
-                    agg = df.groupby(['xBin', 'yBin', 'timeBinDatetime']).agg(agg_dict).reset_index()
+            available_agg_fields = [f for f in aggregation_fields if f in df.columns]
+            if available_agg_fields:
+                # One block-wise sum over all fields instead of a per-column agg dict
+                agg = df.loc[valid, available_agg_fields].groupby(bin_keys).sum().reset_index()
             else:
+                if aggregation_fields:
+                    _logger.warning("Selected aggregation fields not found, using count")
                 # Just count records
-                df['count'] = 1
-                agg = df.groupby(['xBin', 'yBin', 'timeBinDatetime'])['count'].sum().reset_index()
+                agg = time_bin.groupby(bin_keys).size().reset_index(name='count')
             
             # Add centroid coordinates
             agg['longitude'] = agg['xBin'] * grid_deg + grid_deg / 2
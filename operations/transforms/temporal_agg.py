@@ -5,10 +5,12 @@ Temporal Aggregation Operation - Complete with UI and execution
 import streamlit as st
 import pandas as pd
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 from operations.base import BaseOperation
-from operations.config import TIME_BINS, DEFAULT_TIME_BIN, ENDPOINT_OPTIONS
+from operations.config import (
+    TIME_BINS, TIME_BIN_OPTIONS, DEFAULT_TIME_BIN_INDEX, LARGE_FILE_THRESHOLD_MB, CSV_CHUNK_SIZE
+)
 from ui_helpers import utils
 
 _logger = logging.getLogger("temporal_agg")
@@ -17,6 +19,8 @@ _logger = logging.getLogger("temporal_agg")
 class TemporalAggOperation(BaseOperation):
     """Aggregate data into temporal bins"""
     
+    run_in_background = True
+    
     def get_metadata(self) -> Dict[str, str]:
         return {
             'key': 'temporal_agg',
@@ -28,19 +32,17 @@ class TemporalAggOperation(BaseOperation):
     def render_ui(self) -> Optional[Dict[str, Any]]:
         """Render UI and return params if Run clicked"""
         
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         st.markdown("### Configuration")
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
         
         # Load file preview for column selection
         try:
-            preview_df = pd.read_csv(file_options[selected_file], nrows=5)
+            preview_df = utils.get_file_preview(file_options[selected_file], n_rows=5)
             
             # Time column selection
             st.markdown("**⏰ Select time column:**")
@@ -61,8 +63,8 @@ class TemporalAggOperation(BaseOperation):
         st.markdown("---")
         
         time_bin = st.selectbox("Time bin:", 
-                               options=list(TIME_BINS.keys()),
-                               index=list(TIME_BINS.keys()).index(DEFAULT_TIME_BIN))
+                               options=TIME_BIN_OPTIONS,
+                               index=DEFAULT_TIME_BIN_INDEX)
         
         # Aggregation field selection (optional for temporal)
         st.markdown("### Aggregation Settings")
@@ -107,39 +109,36 @@ class TemporalAggOperation(BaseOperation):
         
         try:
             _logger.info(f"temporal_agg start input={input_file} time_col={time_col} time_bin={time_bin_minutes}")
-            df = pd.read_csv(input_file)
             
             # Check if time column exists
-            if time_col not in df.columns:
+            columns = utils.get_csv_columns(input_file)
+            if time_col not in columns:
                 return {"success": False, "error": f"Time column '{time_col}' not found"}
             
-            # Convert to datetime
-            df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-            df = df[df[time_col].notna()].copy()
-            
-            if len(df) == 0:
-                return {"success": False, "error": "No valid time data found"}
+            # Fields to sum (records are counted if none are available)
+            agg_fields = [f for f in aggregation_fields if f in columns and f != time_col]
+            if aggregation_fields and not agg_fields:
+                _logger.warning("Selected aggregation fields not found, using count")
             
-            # Create time bins (using camelCase names)
-            minutes = df[time_col].dt.hour * 60 + df[time_col].dt.minute
-            df['timeBinMinutes'] = (minutes // time_bin_minutes) * time_bin_minutes + time_bin_minutes
-            df['timeBinDatetime'] = pd.to_datetime(df[time_col].dt.date.astype(str)) + pd.to_timedelta(df['timeBinMinutes'], unit='m')
+            # Only load the columns the aggregation uses
+            usecols = [time_col] + agg_fields
             
-            # Determine aggregation strategy
-            if aggregation_fields:
-                # Aggregate selected fields
-                available_agg_fields = [f for f in aggregation_fields if f in df.columns]
-                if not available_agg_fields:
-                    _logger.warning("Selected aggregation fields not found, using count")
-                    df['count'] = 1
-                    agg = df.groupby(['timeBinDatetime'])['count'].sum().reset_index()
-                else:
-                    agg_dict = {field: 'sum' for field in available_agg_fields}
-                    agg = df.groupby(['timeBinDatetime']).agg(agg_dict).reset_index()
+            if Path(input_file).stat().st_size > LARGE_FILE_THRESHOLD_MB * 1024 * 1024:
+                # Bin sums are associative, so large files are aggregated chunk by chunk
+                _logger.info(f"temporal_agg reading in chunks of {CSV_CHUNK_SIZE} rows")
+                partials = [
+                    self._aggregate_bins(chunk, time_col, time_bin_minutes, agg_fields)
+                    for chunk in pd.read_csv(input_file, usecols=usecols, chunksize=CSV_CHUNK_SIZE)
+                ]
+                agg = pd.concat(partials).groupby(level=0).sum()
             else:
-                # Just count records
-                df['count'] = 1
-                agg = df.groupby(['timeBinDatetime'])['count'].sum().reset_index()
+                df = utils.read_csv_fast(input_file, usecols=usecols)
+                agg = self._aggregate_bins(df, time_col, time_bin_minutes, agg_fields)
+            
+            if len(agg) == 0:
+                return {"success": False, "error": "No valid time data found"}
+            
+            agg = agg.reset_index()
             
             # Save output
             input_path = Path(input_file)
@@ -158,3 +157,33 @@ class TemporalAggOperation(BaseOperation):
         except Exception as e:
             _logger.error(f"temporal_agg error: {e}")
             return {"success": False, "error": str(e)}
+    
+    def _aggregate_bins(self, df: pd.DataFrame, time_col: str, time_bin_minutes: int,
+                        agg_fields: List[str]) -> pd.DataFrame:
+        """
+        Count records (or sum agg_fields) per time bin.
+        
+        Args:
+            df: Data with the time column and aggregation fields
+            time_col: Name of the time column
+            time_bin_minutes: Bin size in minutes
+            agg_fields: Numeric fields to sum; records are counted if empty
+        
+        Returns:
+            DataFrame indexed by timeBinDatetime
+        """
+        # Filter out invalid times without copying the frame
+        times = utils.parse_datetimes(df[time_col])
+        valid = times.notna()
+        
+        # Create time bins (using camelCase names)
+        # Each record is labelled with the end of its bin
+        time_bin = utils.time_bin_ends(times[valid], time_bin_minutes).rename('timeBinDatetime')
+        
+        if agg_fields:
+            # One block-wise sum over all fields instead of a per-column agg dict
+            return df.loc[valid, agg_fields].groupby(time_bin).sum()
+        
+        # Just count records (value_counts uses a single-key hash table, cheaper than groupby)
+        counts = time_bin.value_counts(sort=False).sort_index()
+        return counts.rename_axis('timeBinDatetime').to_frame('count')
@@ -3,6 +3,7 @@ Time Binning Operation
 Maps timestamps to time bins without aggregation - keeps all rows
 """
 
+import re
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -12,16 +13,31 @@ from typing import Dict, Any
 import logging
 
 from operations.base import BaseOperation, DataSourceHelper
-from operations.config import TIME_BINS, DEFAULT_TIME_BIN, OUTPUT_FORMATS
+from operations.config import TIME_BINS, TIME_BIN_OPTIONS, DEFAULT_TIME_BIN_INDEX, TABLE_OUTPUT_FORMATS
 from config import Config
 from ui_helpers import utils
 
 _logger = logging.getLogger("time_binning")
 
+# Time strings accepted by _bin_timestamp: HH:MM, HH:MM:SS or YYYY-MM-DD HH:MM:SS
+_TIME_PATTERN = re.compile(
+    r'^(?:(?P<date>\d{4}-\d{2}-\d{2}) (?=\d{1,2}:\d{1,2}:\d{1,2}\Z))?'
+    r'(?P<hour>\d{1,2}):(?P<minute>\d{1,2})(?::(?P<second>\d{1,2}))?\Z'
+)
+
+# Pandas datetime rounding method for each rounding option
+_ROUNDING_METHODS = {
+    "floor": "floor",
+    "ceil": "ceil",
+    "nearest": "round"
+}
+
 
 class TimeBinningOperation(BaseOperation):
     """Map timestamps to time bins without aggregating data"""
     
+    run_in_background = True
+    
     def get_id(self) -> str:
         return "time_binning"
     
@@ -56,13 +72,11 @@ class TimeBinningOperation(BaseOperation):
         st.markdown("---")
         
         # Data source selection
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first to generate aggregated files.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         st.markdown("### 📊 Data Source")
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
         
@@ -75,8 +89,8 @@ class TimeBinningOperation(BaseOperation):
             # Time bin size selection
             time_bin_label = st.selectbox(
                 "Time bin size:",
-                options=list(TIME_BINS.keys()),
-                index=list(TIME_BINS.keys()).index(DEFAULT_TIME_BIN),
+                options=TIME_BIN_OPTIONS,
+                index=DEFAULT_TIME_BIN_INDEX,
                 help="Size of time bins to map timestamps to"
             )
             time_bin_minutes = TIME_BINS[time_bin_label]
@@ -142,7 +156,11 @@ class TimeBinningOperation(BaseOperation):
         col1, col2 = st.columns(2)
         
         with col1:
-            output_format = st.selectbox("Output format:", options=OUTPUT_FORMATS)
+            output_format = st.selectbox(
+                "Output format:",
+                options=TABLE_OUTPUT_FORMATS,
+                help="Parquet is smaller and much faster to read back, but only CSV files are listed as inputs for other operations"
+            )
         
         with col2:
             time_suffix = utils.get_time_filter_suffix()
@@ -190,7 +208,7 @@ class TimeBinningOperation(BaseOperation):
             _logger.info("Starting time binning operation")
             
             # Load data
-            df = pd.read_csv(input_file)
+            df = utils.read_csv_fast(input_file)
             if df is None or df.empty:
                 return {"success": False, "error": "No data loaded"}
             
@@ -225,11 +243,10 @@ class TimeBinningOperation(BaseOperation):
             # Save output
             input_path = Path(input_file)
             
-            if output_format == 'csv':
-                output_path = input_path.parent / f"{input_path.stem}{output_suffix}.csv"
-                df_binned.to_csv(output_path, index=False)
+            if output_format == 'parquet':
+                output_path = input_path.parent / f"{input_path.stem}{output_suffix}.parquet"
+                df_binned.to_parquet(output_path, index=False, compression='zstd')
             else:
-                # Shapefile not applicable for this operation
                 output_path = input_path.parent / f"{input_path.stem}{output_suffix}.csv"
                 df_binned.to_csv(output_path, index=False)
             
@@ -296,14 +313,14 @@ class TimeBinningOperation(BaseOperation):
         
         # Bin start time
         if bin_start_time and start_time_col:
-            df_result[start_time_col] = df_result[start_time_col].apply(
-                lambda x: self._bin_timestamp(x, time_bin_minutes, rounding_method)
+            df_result[start_time_col] = self._bin_series(
+                df_result[start_time_col], time_bin_minutes, rounding_method
             )
         
         # Bin end time
         if bin_end_time and end_time_col:
-            df_result[end_time_col] = df_result[end_time_col].apply(
-                lambda x: self._bin_timestamp(x, time_bin_minutes, rounding_method)
+            df_result[end_time_col] = self._bin_series(
+                df_result[end_time_col], time_bin_minutes, rounding_method
             )
         
         # Add bin label
@@ -311,12 +328,38 @@ class TimeBinningOperation(BaseOperation):
             # Use the first binned time column for label
             time_col = start_time_col if (bin_start_time and start_time_col) else end_time_col
             if time_col:
-                df_result['timeBin'] = df_result[time_col].apply(
-                    lambda x: self._create_bin_label(x, time_bin_minutes)
-                )
+                df_result['timeBin'] = self._create_bin_labels(df_result[time_col], time_bin_minutes)
         
         return df_result
     
+    def _bin_series(self, series: pd.Series, bin_minutes: int, method: str = "nearest") -> pd.Series:
+        """
+        Bin a whole time column using pandas' vectorized datetime rounding.
+        
+        Args:
+            series: Time strings or datetimes
+            bin_minutes: Bin size in minutes
+            method: 'nearest', 'floor', or 'ceil'
+        
+        Returns:
+            Series of binned time strings (HH:MM:SS)
+        """
+        parsed = utils.parse_datetimes(series)
+        
+        # Seconds are ignored, as in _bin_timestamp
+        rounding = _ROUNDING_METHODS.get(method, "round")
+        binned = getattr(parsed.dt.floor('min').dt, rounding)(f'{bin_minutes}min')
+        result = binned.dt.strftime('%H:%M:%S').where(parsed.notna(), series)
+        
+        # Bin values pandas could not parse one at a time
+        unparsed = parsed.isna() & series.notna()
+        if unparsed.any():
+            result[unparsed] = series[unparsed].apply(
+                lambda x: self._bin_timestamp(x, bin_minutes, method)
+            )
+        
+        return result
+    
     def _bin_timestamp(self, timestamp, bin_minutes: int, method: str = "nearest"):
         """
         Bin a single timestamp.
@@ -332,15 +375,17 @@ class TimeBinningOperation(BaseOperation):
         try:
             # Parse timestamp if string
             if isinstance(timestamp, str):
-                # Try different time formats
-                for fmt in ['%H:%M:%S', '%H:%M', '%Y-%m-%d %H:%M:%S']:
-                    try:
-                        dt = datetime.strptime(timestamp, fmt)
-                        break
-                    except:
-                        continue
-                else:
+                # Match all supported formats in one scan instead of trying strptime per format
+                match = _TIME_PATTERN.match(timestamp)
+                if match is None:
+                    return timestamp
+                hour, minute, second = (int(match.group(g) or 0) for g in ('hour', 'minute', 'second'))
+                if hour > 23 or minute > 59 or second > 59:
                     return timestamp
+                if match.group('date'):
+                    # Reject impossible dates like strptime does
+                    datetime.strptime(match.group('date'), '%Y-%m-%d')
+                dt = datetime(1900, 1, 1, hour, minute)
             elif isinstance(timestamp, pd.Timestamp):
                 dt = timestamp.to_pydatetime()
             elif isinstance(timestamp, datetime):
@@ -372,6 +417,30 @@ class TimeBinningOperation(BaseOperation):
             _logger.warning(f"Could not bin timestamp {timestamp}: {e}")
             return timestamp
     
+    def _create_bin_labels(self, series: pd.Series, bin_minutes: int) -> pd.Series:
+        """
+        Create readable bin labels for a whole binned time column.
+        
+        Args:
+            series: Binned time strings
+            bin_minutes: Bin size in minutes
+        
+        Returns:
+            Series of labels (e.g., '14:00-14:30')
+        """
+        starts = utils.parse_datetimes(series)
+        ends = starts + pd.Timedelta(minutes=bin_minutes)
+        labels = starts.dt.strftime('%H:%M') + '-' + ends.dt.strftime('%H:%M')
+        
+        # Label values pandas could not parse one at a time
+        unparsed = starts.isna()
+        if unparsed.any():
+            labels[unparsed] = series[unparsed].apply(
+                lambda x: self._create_bin_label(x, bin_minutes)
+            )
+        
+        return labels
+    
     def _create_bin_label(self, timestamp, bin_minutes: int):
         """
         Create readable bin label (e.g., '14:00-14:30').
@@ -4,21 +4,53 @@ Time Slice Operation - Complete with UI and execution
 
 import streamlit as st
 import pandas as pd
-import geopandas as gpd
+import numpy as np
+import json
 import logging
-from typing import Dict, Any, Optional
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from operations.base import BaseOperation
-from operations.config import OUTPUT_FORMATS
+from operations.config import (
+    SPATIAL_OUTPUT_FORMATS, LARGE_FILE_THRESHOLD_MB, CSV_CHUNK_SIZE, TIME_SORTED_PARQUET_SUFFIX
+)
 from ui_helpers import utils
 from config import Config
 
 _logger = logging.getLogger("time_slice")
 
+# Time index sidecar: the CSV's rows as Parquet, partitioned by minute of the day
+TIME_INDEX_SUFFIX = '.tindex.parquet'
+TIME_INDEX_COLUMN = 'tindex_minute'
+# Written into a finished index: the CSV it was built from and its row count
+# (the leading underscore keeps pyarrow from reading it as data)
+TIME_INDEX_MANIFEST = '_tindex.json'
+# Marker left when a CSV could not be indexed, so later runs do not retry until it changes
+TIME_INDEX_SKIP_SUFFIX = '.tindex.skip'
+
+
+@st.cache_resource(show_spinner=False)
+def _load_neighborhoods(shp_path: str, mtime: float) -> pd.DataFrame:
+    """Load neighborhood codes and geometries (shared until the shapefile changes)."""
+    import geopandas as gpd
+    
+    neighborhoods = gpd.read_file(shp_path)[['CODE', 'geometry']]
+    # Narrow integer codes make the join a numeric hash join instead of comparing objects
+    try:
+        return neighborhoods.assign(CODE=pd.to_numeric(neighborhoods['CODE'], downcast='integer'))
+    except (ValueError, TypeError):
+        _logger.warning("Neighborhood CODE values are not numeric, joining on the original values")
+        return neighborhoods
+
 
 class TimeSliceOperation(BaseOperation):
     """Extract specific time points"""
     
+    run_in_background = True
+    
     def get_metadata(self) -> Dict[str, str]:
         return {
             'key': 'time_slice',
@@ -30,13 +62,11 @@ class TimeSliceOperation(BaseOperation):
     def render_ui(self) -> Optional[Dict[str, Any]]:
         """Render UI and return params if Run clicked"""
         
-        aggregated_files = utils.get_aggregated_files()
-        if not aggregated_files:
+        file_options = utils.get_aggregated_file_options()
+        if not file_options:
             st.warning("⚠️ Please run an analysis first to generate aggregated files.")
             return None
         
-        file_options = {f.name: str(f) for f in aggregated_files}
-        
         selected_file = st.selectbox("Input file:", options=list(file_options.keys()))
         times = st.text_input("Time points (HH:MM, comma separated):", value="08:00,12:30,18:00")
         
@@ -47,7 +77,11 @@ class TimeSliceOperation(BaseOperation):
             default_suffix = f"_{time_suffix}_times_selected"
             output_suffix = st.text_input("Output suffix:", value=default_suffix)
         with col2:
-            output_format = st.selectbox("Output format:", options=OUTPUT_FORMATS)
+            output_format = st.selectbox(
+                "Output format:",
+                options=SPATIAL_OUTPUT_FORMATS,
+                help="GeoParquet and FlatGeobuf write much faster than Shapefile and have no field name or 2 GB limits"
+            )
         
         if st.button("▶️ Run", type="primary", width='stretch'):
             time_list = [t.strip() for t in times.split(",") if t.strip()]
@@ -69,17 +103,54 @@ class TimeSliceOperation(BaseOperation):
         
         try:
             _logger.info(f"time_slice start input={input_file} times={times}")
-            df = pd.read_csv(input_file)
             
-            if 'TIME' not in df.columns:
-                if 'time_bin_datetime' in df.columns:
-                    df['time_bin_datetime'] = pd.to_datetime(df['time_bin_datetime'], errors='coerce')
-                    df = df[df['time_bin_datetime'].notna()]
-                    df['TIME'] = df['time_bin_datetime'].dt.strftime('%H:%M')
-                else:
+            # Selected times as minutes of the day, labelled once for the rows that match
+            time_labels = self._minute_labels(times)
+            
+            columns = utils.get_csv_columns(input_file)
+            
+            sliced = None
+            sorted_path = Path(input_file).with_name(Path(input_file).stem + TIME_SORTED_PARQUET_SUFFIX)
+            if self._is_up_to_date(sorted_path, input_file):
+                # TIME-sorted copy written by the analysis engine: TIME is filtered inside the reader
+                try:
+                    sliced = self._slice_parquet(sorted_path, columns, time_labels)
+                except Exception as e:
+                    _logger.warning(f"time_slice ignoring unreadable Parquet copy {sorted_path}: {e}")
+            
+            index_path = Path(input_file).with_name(Path(input_file).stem + TIME_INDEX_SUFFIX)
+            skip_path = Path(input_file).with_name(Path(input_file).stem + TIME_INDEX_SKIP_SUFFIX)
+            build_index = not self._is_up_to_date(skip_path, input_file)
+            manifest = self._read_index_manifest(index_path, input_file) if sliced is None else None
+            if manifest is not None:
+                # Complete time index of this CSV version: only the selected minute partitions are read
+                try:
+                    sliced = self._slice_time_index(index_path, time_labels, manifest['rows'])
+                except Exception as e:
+                    if self._read_index_manifest(index_path, input_file) == manifest:
+                        _logger.warning(f"time_slice removing invalid time index {index_path}: {e}")
+                        shutil.rmtree(index_path, ignore_errors=True)
+                        skip_path.touch()
+                        build_index = False
+                    else:
+                        # Another run swapped in a new index while this one was reading
+                        _logger.info(f"time_slice time index {index_path} replaced during read, using the CSV")
+            
+            if sliced is None:
+                if 'TIME' not in columns and 'time_bin_datetime' not in columns:
                     return {"success": False, "error": "Time column not found (TIME/time_bin_datetime)"}
+                sliced = self._slice_csv(input_file, columns, time_labels,
+                                         index_path=index_path if build_index else None)
+            
+            filtered_df, total_count = sliced
+            
+            # Time points with no matching rows (typos, or times the file does not contain)
+            found_times = filtered_df['TIME'].unique() if 'TIME' in filtered_df.columns else []
+            found_minutes = {self._to_minute(t) for t in found_times}
+            unmatched_times = [t for t in times if self._to_minute(t) not in found_minutes]
+            if unmatched_times:
+                _logger.warning(f"time_slice no rows for times={unmatched_times}")
             
-            filtered_df = df[df['TIME'].isin(times)].copy()
             input_path = Path(input_file)
             
             if output_format == "csv":
@@ -90,28 +161,311 @@ class TimeSliceOperation(BaseOperation):
                     "success": True,
                     "output_path": str(output_path),
                     "filtered_count": len(filtered_df),
-                    "total_count": len(df)
+                    "total_count": total_count,
+                    "unmatched_times": unmatched_times
                 }
             else:
                 if 'CODE' not in filtered_df.columns:
-                    return {"success": False, "error": "CODE column required for Shapefile"}
+                    return {"success": False, "error": "CODE column required for spatial output"}
+                
+                if filtered_df.empty:
+                    # Nothing to join: skip loading the neighborhoods and writing an empty layer
+                    _logger.info(f"time_slice no matching rows, {output_format} output skipped")
+                    return {
+                        "success": True,
+                        "output_path": None,
+                        "filtered_count": 0,
+                        "total_count": total_count,
+                        "unmatched_times": unmatched_times
+                    }
                 
                 config = Config()
-                neighborhoods = gpd.read_file(config.neighborhoods_shapefile)
-                gdf = neighborhoods[['CODE', 'geometry']].merge(filtered_df, on='CODE', how='inner')
+                neighborhoods_path = Path(config.neighborhoods_shapefile)
+                neighborhoods = _load_neighborhoods(str(neighborhoods_path), neighborhoods_path.stat().st_mtime)
+                if pd.api.types.is_integer_dtype(neighborhoods['CODE']):
+                    filtered_df = filtered_df.assign(
+                        CODE=pd.to_numeric(filtered_df['CODE'], downcast='integer')
+                    )
+                gdf = neighborhoods.merge(filtered_df, on='CODE', how='inner', sort=False)
                 # Save to GIS output directory
                 output_dir = config.gis_output_path / f"{input_path.stem}{output_suffix}"
                 output_dir.mkdir(exist_ok=True, parents=True)
-                shp_path = output_dir / f"{input_path.stem}{output_suffix}.shp"
-                gdf.to_file(shp_path)
-                _logger.info(f"time_slice success shp rows={len(gdf)}")
+                output_stem = f"{input_path.stem}{output_suffix}"
+                if output_format == "geoparquet":
+                    geo_path = output_dir / f"{output_stem}.parquet"
+                    gdf.to_parquet(geo_path, index=False)
+                elif output_format == "fgb":
+                    geo_path = output_dir / f"{output_stem}.fgb"
+                    gdf.to_file(geo_path, driver='FlatGeobuf', engine='pyogrio')
+                else:
+                    geo_path = output_dir / f"{output_stem}.shp"
+                    # pyogrio writes features in bulk instead of one record at a time
+                    gdf.to_file(geo_path, engine='pyogrio')
+                _logger.info(f"time_slice success {output_format} rows={len(gdf)}")
                 return {
                     "success": True,
-                    "output_path": str(shp_path),
+                    "output_path": str(geo_path),
                     "filtered_count": len(gdf),
-                    "total_count": len(df)
+                    "total_count": total_count,
+                    "unmatched_times": unmatched_times
                 }
                 
         except Exception as e:
             _logger.error(f"time_slice error: {e}")
             return {"success": False, "error": str(e)}
+    
+    def _slice_csv(self, input_file: str, columns: List[str], time_labels: Dict[int, str],
+                   index_path: Optional[Path] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Read the rows of a CSV file whose time of day is one of time_labels.
+        
+        Args:
+            input_file: Aggregated CSV with a TIME or time_bin_datetime column
+            columns: Header of the CSV file
+            time_labels: Selected minutes of the day mapped to HH:MM labels
+            index_path: If given, every row read is also written to this time index
+        
+        Returns:
+            Tuple of (matching rows, number of rows with a valid time)
+        """
+        # TIME has few distinct values, so parse it straight into a categorical:
+        # isin then compares small integer codes instead of strings
+        time_dtype = {'TIME': 'category'} if 'TIME' in columns else None
+        
+        # Taken before reading, so an index is never credited to a newer version of the CSV
+        source_stat = Path(input_file).stat()
+        
+        if source_stat.st_size > LARGE_FILE_THRESHOLD_MB * 1024 * 1024:
+            # Filter large files chunk by chunk so only matching rows are kept in memory
+            _logger.info(f"time_slice reading in chunks of {CSV_CHUNK_SIZE} rows")
+            chunks = pd.read_csv(input_file, dtype=time_dtype, chunksize=CSV_CHUNK_SIZE)
+        elif 'TIME' in columns:
+            # read_csv_fast cannot parse TIME straight into a categorical
+            chunks = [pd.read_csv(input_file, dtype=time_dtype)]
+        else:
+            chunks = [utils.read_csv_fast(input_file)]
+        
+        # Each run builds its index in its own temporary directory, which only replaces
+        # the published one once complete. Every chunk is written with the schema of the
+        # first, so the files stay readable together
+        index_tmp = None
+        if index_path:
+            index_tmp = Path(tempfile.mkdtemp(dir=index_path.parent, prefix=index_path.name + '.', suffix='.tmp'))
+        index_schema = None
+        index_rows = 0
+        
+        target_minutes = list(time_labels)
+        parts = []
+        total_count = 0
+        for chunk in chunks:
+            if 'TIME' in chunk.columns:
+                total_count += len(chunk)
+                # Parse the few distinct TIME values once and match rows by category code
+                time_values = pd.to_datetime(chunk['TIME'].cat.categories, format='%H:%M', errors='coerce')
+                category_minutes = time_values.hour * 60 + time_values.minute
+                wanted_codes = np.flatnonzero(category_minutes.isin(target_minutes))
+                codes = chunk['TIME'].cat.codes
+                keep = codes.isin(wanted_codes)
+                if index_tmp:
+                    # Missing TIME values (code -1) pick the trailing NA
+                    row_minutes = pd.array(list(category_minutes) + [None], dtype='Int32')[codes.to_numpy()]
+                    index_tmp, index_schema = self._append_time_index(
+                        index_tmp, chunk.assign(**{TIME_INDEX_COLUMN: row_minutes}), index_schema
+                    )
+                    index_rows += len(chunk)
+                # Back to plain strings for the (small) output
+                chunk = chunk[keep].astype({'TIME': str})
+            else:
+                # Filter on integer minutes instead of formatting every timestamp
+                bin_times = utils.parse_datetimes(chunk['time_bin_datetime'])
+                valid = bin_times.notna()
+                total_count += int(valid.sum())
+                minute_of_day = bin_times.dt.hour * 60 + bin_times.dt.minute
+                keep = minute_of_day.isin(target_minutes)
+                if index_tmp:
+                    index_tmp, index_schema = self._append_time_index(index_tmp, chunk[valid].assign(**{
+                        'time_bin_datetime': bin_times[valid],
+                        TIME_INDEX_COLUMN: minute_of_day[valid].astype('int32')
+                    }), index_schema)
+                    index_rows += int(valid.sum())
+                chunk = chunk[keep].assign(
+                    time_bin_datetime=bin_times[keep],
+                    TIME=minute_of_day[keep].astype(int).map(time_labels)
+                )
+            
+            parts.append(chunk)
+        
+        skip_path = Path(input_file).with_name(Path(input_file).stem + TIME_INDEX_SKIP_SUFFIX)
+        if index_tmp and index_schema is not None:
+            self._publish_time_index(index_tmp, index_path, input_file, source_stat, index_rows)
+            skip_path.unlink(missing_ok=True)
+        elif index_tmp:
+            # No rows to index
+            shutil.rmtree(index_tmp, ignore_errors=True)
+        elif index_path:
+            # The build failed part way: do not retry it on every run
+            skip_path.touch()
+        
+        if len(parts) == 1:
+            # Small files are a single part: use it as is instead of concat copying it
+            filtered_df = parts[0]
+        else:
+            filtered_df = pd.concat(parts) if parts else pd.DataFrame(columns=columns)
+        
+        return filtered_df, total_count
+    
+    @staticmethod
+    def _slice_parquet(parquet_path: Path, columns: List[str],
+                       time_labels: Dict[int, str]) -> Optional[Tuple[pd.DataFrame, int]]:
+        """
+        Read matching rows from the TIME-sorted Parquet copy of a CSV.
+        
+        Returns None if the copy does not hold the CSV's columns plus a
+        string TIME column, so the caller falls back to the CSV.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        
+        dataset = ds.dataset(str(parquet_path), format='parquet')
+        schema = dataset.schema
+        time_type = schema.field('TIME').type if 'TIME' in schema.names else None
+        csv_columns = [c for c in columns if c != 'TIME']
+        if (time_type is None
+                or not (pa.types.is_string(time_type) or pa.types.is_large_string(time_type))
+                or [n for n in schema.names if n != 'TIME'] != csv_columns):
+            _logger.warning(f"time_slice ignoring Parquet copy {parquet_path}: columns or TIME type do not match the CSV")
+            return None
+        
+        # Row groups whose TIME statistics exclude the selection are skipped
+        table = dataset.to_table(filter=ds.field('TIME').isin(list(time_labels.values())))
+        return table.to_pandas(), dataset.count_rows()
+    
+    @staticmethod
+    def _append_time_index(index_dir: Path, rows: pd.DataFrame,
+                           schema=None) -> Tuple[Optional[Path], Optional[Any]]:
+        """
+        Add rows to a time index being built.
+        
+        The first call fixes the index schema from its rows; later rows are
+        converted to it. Columns with no values yet or with categories are
+        stored as strings, so text showing up in later chunks still fits.
+        
+        Returns:
+            Tuple of (index_dir, schema), or (None, None) after dropping the
+            index on failure
+        """
+        import pyarrow as pa
+        
+        def is_text(arrow_type):
+            return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+        
+        try:
+            if schema is None:
+                schema = pa.Schema.from_pandas(rows, preserve_index=False)
+                for i, field in enumerate(schema):
+                    if field.name == TIME_INDEX_COLUMN:
+                        continue
+                    if pa.types.is_dictionary(field.type) or rows[field.name].isna().all():
+                        schema = schema.set(i, pa.field(field.name, pa.string()))
+            
+            text_columns = {
+                field.name: rows[field.name].astype(object).map(str, na_action='ignore')
+                for field in schema
+                if is_text(field.type) and not pd.api.types.is_string_dtype(rows[field.name])
+            }
+            rows.assign(**text_columns).to_parquet(
+                index_dir, partition_cols=[TIME_INDEX_COLUMN], index=False, schema=schema
+            )
+            return index_dir, schema
+        except Exception as e:
+            _logger.warning(f"time_slice could not build time index: {e}")
+            shutil.rmtree(index_dir, ignore_errors=True)
+            return None, None
+    
+    @staticmethod
+    def _slice_time_index(index_path: Path, time_labels: Dict[int, str],
+                          expected_rows: int) -> Tuple[pd.DataFrame, int]:
+        """Read matching rows from a time index written by _slice_csv"""
+        import pyarrow.dataset as ds
+        
+        dataset = ds.dataset(str(index_path), format='parquet', partitioning='hive')
+        total_rows = dataset.count_rows()
+        if total_rows != expected_rows:
+            raise ValueError(f"time index holds {total_rows} rows, its manifest records {expected_rows}")
+        # Partitions are pruned by directory name, so other minutes are never opened
+        table = dataset.to_table(filter=ds.field(TIME_INDEX_COLUMN).isin(list(time_labels)))
+        df = table.to_pandas()
+        
+        minutes = df.pop(TIME_INDEX_COLUMN)
+        if 'TIME' in df.columns:
+            df = df.astype({'TIME': str})
+        else:
+            df['TIME'] = minutes.astype(int).map(time_labels)
+        return df, total_rows
+    
+    @staticmethod
+    def _publish_time_index(index_tmp: Path, index_path: Path, source_file: str,
+                            source_stat: os.stat_result, rows: int) -> None:
+        """Record a finished index build and move it into place, unless another run got there first"""
+        manifest = {
+            'source': Path(source_file).name,
+            'source_mtime_ns': source_stat.st_mtime_ns,
+            'source_size': source_stat.st_size,
+            'rows': rows,
+            'build': index_tmp.name
+        }
+        (index_tmp / TIME_INDEX_MANIFEST).write_text(json.dumps(manifest))
+        
+        if TimeSliceOperation._read_index_manifest(index_path, source_file) is not None:
+            # A concurrent run already published a complete index of this CSV version
+            shutil.rmtree(index_tmp, ignore_errors=True)
+            return
+        
+        shutil.rmtree(index_path, ignore_errors=True)
+        try:
+            os.rename(index_tmp, index_path)
+        except OSError:
+            # Another run's index landed between the check and the rename: keep that one
+            shutil.rmtree(index_tmp, ignore_errors=True)
+            return
+        _logger.info(f"time_slice wrote time index {index_path}")
+    
+    @staticmethod
+    def _read_index_manifest(index_path: Path, source_file: str) -> Optional[Dict[str, Any]]:
+        """Manifest of a complete time index built from the current source_file (None otherwise)"""
+        try:
+            manifest = json.loads((index_path / TIME_INDEX_MANIFEST).read_text())
+            source_stat = Path(source_file).stat()
+        except (OSError, ValueError):
+            return None
+        if (manifest.get('source_mtime_ns') != source_stat.st_mtime_ns
+                or manifest.get('source_size') != source_stat.st_size
+                or not isinstance(manifest.get('rows'), int)):
+            return None
+        return manifest
+    
+    @staticmethod
+    def _is_up_to_date(derived_path: Path, source_file: str) -> bool:
+        """Check that a file derived from source_file exists and is not older than it"""
+        return derived_path.exists() and derived_path.stat().st_mtime >= Path(source_file).stat().st_mtime
+    
+    @staticmethod
+    def _to_minute(time_point: str) -> Optional[int]:
+        """Minute of the day for an H:MM/HH:MM string (None if it is not a valid time)"""
+        try:
+            parsed = datetime.strptime(str(time_point), '%H:%M')
+        except ValueError:
+            return None
+        return parsed.hour * 60 + parsed.minute
+    
+    @classmethod
+    def _minute_labels(cls, times: List[str]) -> Dict[int, str]:
+        """Map each valid H:MM/HH:MM time point to its minute of the day and HH:MM label"""
+        labels = {}
+        for t in times:
+            minute = cls._to_minute(t)
+            if minute is None:
+                _logger.warning(f"time_slice ignoring invalid time point '{t}'")
+                continue
+            labels[minute] = f"{minute // 60:02d}:{minute % 60:02d}"
+        return labels
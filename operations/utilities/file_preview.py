@@ -2,20 +2,16 @@
 File Preview Operation
 """
 
+import csv
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from operations.base import BaseOperation
+from ui_helpers import utils
 from config import DataColumnMetadata
 
 
-def get_aggregated_files():
-    """Get list of aggregated files"""
-    from ui_helpers import utils
-    return utils.get_aggregated_files()
-
-
 def get_available_files():
     """Get list of raw files"""
     from ui_helpers.utils import get_time_filter_from_sidebar
@@ -48,11 +44,10 @@ class FilePreviewOperation(BaseOperation):
         file_source = st.radio("Select file source:", ["Aggregated", "Raw"], horizontal=True)
         
         if file_source == "Aggregated":
-            aggregated_files = get_aggregated_files()
-            if not aggregated_files:
+            file_options = utils.get_aggregated_file_options()
+            if not file_options:
                 st.warning("⚠️ No aggregated files found. Please run an analysis first.")
                 return None
-            file_options = {f.name: str(f) for f in aggregated_files}
         else:  # Raw
             all_files = get_available_files()
             if not all_files:
@@ -81,11 +76,12 @@ class FilePreviewOperation(BaseOperation):
         try:
             # Try to detect format for raw files
             if file_source == "Raw":
-                sample = pd.read_csv(file_path, nrows=2)
-                if "originLatitude" in sample.columns:
+                # The header line is enough to tell the formats apart
+                header = self._read_header(file_path)
+                if "originLatitude" in header:
                     # Tapsi format
                     df = pd.read_csv(file_path, nrows=n_rows)
-                elif len(sample.columns) == 9:
+                elif len(header) == 9:
                     # Snapp format (no headers)
                     df = pd.read_csv(file_path, nrows=n_rows, header=None, names=DataColumnMetadata.get_snapp_columns())
                 else:
@@ -113,3 +109,9 @@ class FilePreviewOperation(BaseOperation):
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def _read_header(file_path: str) -> List[str]:
+        """Split the first line of a CSV file into fields without starting a parser"""
+        with open(file_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+            return next(csv.reader(f), [])
@@ -2,11 +2,36 @@
 Utility Functions for Web UI
 """
 
+import functools
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+import logging
 from config import Config
+import pandas as pd
+import numpy as np
 import streamlit as st
 
+_logger = logging.getLogger("ui_utils")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_config() -> Config:
+    """Shared Config instance (paths are fixed for the lifetime of the process)."""
+    return Config()
+
+
+# Timestamp layouts written by the analysis pipeline, tried in order
+DATETIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%H:%M:%S',
+    '%H:%M'
+]
+
 
 def get_time_filter_from_sidebar():
     """Get time filter configuration from session state."""
@@ -53,38 +78,221 @@ def get_time_filter_suffix() -> str:
         return "ALL"
 
 
+def _is_temporal_arrow_type(arrow_type) -> bool:
+    """True for the date/time/timestamp types pyarrow infers from plain text."""
+    import pyarrow as pa
+    return pa.types.is_date(arrow_type) or pa.types.is_time(arrow_type) or pa.types.is_timestamp(arrow_type)
+
+
+def _read_csv_pyarrow(file_path, usecols=None) -> pd.DataFrame:
+    """
+    Multi-threaded pyarrow CSV read that keeps date/time text as strings.
+    
+    pyarrow infers 'HH:MM' and 'YYYY-MM-DD HH:MM' text as time/timestamp
+    values, which to_csv would write back in a different layout. Those
+    columns are pinned to string using the schema inferred from the first
+    block; the rare column that only looks temporal further down is caught
+    on the full table and triggers one re-read.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    
+    # Empty strings are missing values, as with the C engine
+    base_options = {'strings_can_be_null': True}
+    if usecols is not None:
+        base_options['include_columns'] = list(usecols)
+    with pa_csv.open_csv(file_path, convert_options=pa_csv.ConvertOptions(**base_options)) as reader:
+        schema = reader.schema
+    text_types = {f.name: pa.string() for f in schema if _is_temporal_arrow_type(f.type)}
+    
+    def _read():
+        return pa_csv.read_csv(
+            file_path,
+            convert_options=pa_csv.ConvertOptions(column_types=text_types, **base_options)
+        )
+    
+    table = _read()
+    late = {f.name: pa.string() for f in table.schema if _is_temporal_arrow_type(f.type)}
+    if late:
+        text_types.update(late)
+        table = _read()
+    return table.to_pandas()
+
+
+def read_csv_fast(file_path, **kwargs) -> pd.DataFrame:
+    """
+    Read a CSV file using pyarrow's multi-threaded CSV reader.
+    
+    Values come back as the C engine would load them: numbers and booleans
+    are typed, date/time columns stay as the original strings, so columns
+    that are passed through are written back unchanged. Falls back to the
+    C engine (with low_memory=False for consistent column dtypes) if
+    pyarrow is not installed, cannot handle the file, or other pd.read_csv
+    options are given.
+    
+    Args:
+        file_path: Path to the CSV file
+        **kwargs: Extra arguments passed to pd.read_csv
+    
+    Returns:
+        Loaded DataFrame
+    """
+    if set(kwargs) <= {'usecols'}:
+        try:
+            return _read_csv_pyarrow(file_path, kwargs.get('usecols'))
+        except Exception as e:
+            _logger.debug(f"pyarrow CSV reader unavailable for {file_path}, using C engine: {e}")
+    kwargs.setdefault('low_memory', False)
+    return pd.read_csv(file_path, **kwargs)
+
+
+def detect_datetime_format(value: str) -> Optional[str]:
+    """Return the first of DATETIME_FORMATS that matches value, if any."""
+    for fmt in DATETIME_FORMATS:
+        try:
+            datetime.strptime(value, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def parse_datetimes(values: pd.Series) -> pd.Series:
+    """
+    Convert a column to datetimes, coercing invalid values to NaT.
+    
+    The format is detected once from the first non-null value so pandas
+    can use its fixed-format parser. Rows that do not match it are
+    re-parsed with the other known formats, then with format inference.
+    
+    Args:
+        values: Column of time strings (or datetime-like objects)
+    
+    Returns:
+        datetime64 Series aligned with values
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    
+    sample = values.dropna()
+    if sample.empty:
+        return pd.to_datetime(values, errors='coerce')
+    
+    if not isinstance(sample.iloc[0], str):
+        # e.g. datetime.time objects read from Parquet
+        values = values.map(str, na_action='ignore')
+    
+    fmt = detect_datetime_format(str(sample.iloc[0]))
+    if fmt is None:
+        return pd.to_datetime(values, errors='coerce')
+    
+    parsed = pd.to_datetime(values, format=fmt, errors='coerce', cache=True)
+    
+    # Rows in a different layout: try the other known formats, then inference
+    for other_fmt in [f for f in DATETIME_FORMATS if f != fmt] + [None]:
+        unmatched = parsed.isna() & values.notna()
+        if not unmatched.any():
+            break
+        parsed[unmatched] = pd.to_datetime(values[unmatched], format=other_fmt, errors='coerce')
+    
+    return parsed
+
+
+def time_bin_ends(times: pd.Series, bin_minutes: int) -> pd.Series:
+    """
+    Map datetimes to the end of their time bin.
+    
+    Same result as times.dt.floor(f'{bin_minutes}min') + bin_minutes, but
+    computed in one integer pass over the nanosecond values.
+    
+    Args:
+        times: datetime64 Series without NaT values
+        bin_minutes: Bin size in minutes
+    
+    Returns:
+        datetime64[ns] Series aligned with times
+    """
+    if getattr(times.dt, 'tz', None) is not None:
+        return times.dt.floor(f'{bin_minutes}min') + pd.Timedelta(minutes=bin_minutes)
+    
+    ns = times.to_numpy(dtype='datetime64[ns]').view('i8')
+    bin_ns = bin_minutes * 60 * 1_000_000_000
+    ends = (ns // bin_ns + 1) * bin_ns
+    return pd.Series(ends.view('datetime64[ns]'), index=times.index, name=times.name)
+
+
+def get_csv_columns(file_path) -> List[str]:
+    """Get the column names of a CSV file without reading its rows."""
+    return pd.read_csv(file_path, nrows=0).columns.tolist()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _read_preview(file_path: str, mtime: float, n_rows: int) -> pd.DataFrame:
+    """Read the first rows of a CSV file (cached per file version)."""
+    return pd.read_csv(file_path, nrows=n_rows)
+
+
+def get_file_preview(file_path: str, n_rows: int = 5) -> pd.DataFrame:
+    """
+    Get the first rows of a CSV file, cached across Streamlit reruns.
+    
+    Args:
+        file_path: Path to the CSV file
+        n_rows: Number of rows to read
+    
+    Returns:
+        DataFrame with the first n_rows rows
+    """
+    return _read_preview(str(file_path), Path(file_path).stat().st_mtime, n_rows)
+
+
+@st.cache_data(show_spinner=False)
+def _list_csv_files(dir_path: str, dir_mtime: float) -> tuple:
+    """List CSV files in a directory (cached until the directory changes)."""
+    return tuple(str(f) for f in Path(dir_path).glob("*.csv"))
+
+
+def _csv_files_in(dir_path: Path) -> List[Path]:
+    """List CSV files in a directory, re-globbing only when it changes."""
+    if not dir_path.exists():
+        return []
+    return [Path(f) for f in _list_csv_files(str(dir_path), dir_path.stat().st_mtime)]
+
+
 def get_available_files(data_source: str) -> Dict[str, List[str]]:
     """Get list of available files for a data source."""
     try:
-        config = Config()
+        config = _get_config()
         if data_source == "snapp":
-            path = config.snapp_raw_path
-            files = [f.name for f in path.glob("*.csv")] if path.exists() else []
+            files = [f.name for f in _csv_files_in(config.snapp_raw_path)]
             return {"snapp": files}
         elif data_source == "tapsi":
-            path = config.tapsi_raw_path
-            files = [f.name for f in path.glob("*.csv")] if path.exists() else []
+            files = [f.name for f in _csv_files_in(config.tapsi_raw_path)]
             return {"tapsi": files}
         else:  # both
-            snapp_path = config.snapp_raw_path
-            tapsi_path = config.tapsi_raw_path
-            snapp_files = [f.name for f in snapp_path.glob("*.csv")] if snapp_path.exists() else []
-            tapsi_files = [f.name for f in tapsi_path.glob("*.csv")] if tapsi_path.exists() else []
+            snapp_files = [f.name for f in _csv_files_in(config.snapp_raw_path)]
+            tapsi_files = [f.name for f in _csv_files_in(config.tapsi_raw_path)]
             return {"snapp": snapp_files, "tapsi": tapsi_files}
     except Exception as e:
         return {"error": str(e)}
 
 
-def get_aggregated_files() -> List[Path]:
-    """Get list of aggregated CSV files."""
+@st.cache_data(show_spinner=False)
+def _csv_file_options(dir_path: str, dir_mtime: float) -> Dict[str, str]:
+    """Map CSV file names to paths (cached until the directory changes)."""
+    return {Path(f).name: f for f in _list_csv_files(dir_path, dir_mtime)}
+
+
+def get_aggregated_file_options() -> Dict[str, str]:
+    """Get aggregated CSV files as a {file name: path} mapping for file selectors."""
     try:
-        config = Config()
+        config = _get_config()
         aggregated_path = config.aggregated_path
         if aggregated_path.exists():
-            return list(aggregated_path.glob("*.csv"))
-        return []
+            return _csv_file_options(str(aggregated_path), aggregated_path.stat().st_mtime)
+        return {}
     except Exception:
-        return []
+        return {}
 
 
 def get_raw_files() -> Dict[str, List[Path]]:
@@ -95,12 +303,10 @@ def get_raw_files() -> Dict[str, List[Path]]:
         Dictionary with 'snapp' and 'tapsi' keys containing lists of file paths
     """
     try:
-        config = Config()
-        snapp_files = list(config.snapp_raw_path.glob("*.csv")) if config.snapp_raw_path.exists() else []
-        tapsi_files = list(config.tapsi_raw_path.glob("*.csv")) if config.tapsi_raw_path.exists() else []
+        config = _get_config()
         return {
-            "snapp": snapp_files,
-            "tapsi": tapsi_files
+            "snapp": _csv_files_in(config.snapp_raw_path),
+            "tapsi": _csv_files_in(config.tapsi_raw_path)
         }
     except Exception:
         return {"snapp": [], "tapsi": []}
@@ -118,7 +324,7 @@ def get_boundary_shapefile_path(boundary_source: str, config_obj=None):
         Path to shapefile
     """
     if config_obj is None:
-        config_obj = Config()
+        config_obj = _get_config()
     
     return config_obj.get_shapefile_path(boundary_source)
 
@@ -135,9 +341,7 @@ def get_shapefile_zones(boundary_source: str) -> Dict[str, List]:
         Dictionary with 'field' (field name) and 'values' (sorted unique values)
     """
     try:
-        import geopandas as gpd
-        from operations.config import get_shapefile_fields, get_default_field
-        config = Config()
+        config = _get_config()
         
         # Get shapefile path dynamically
         layers_path = config.gis_layers_path
@@ -152,46 +356,57 @@ def get_shapefile_zones(boundary_source: str) -> Dict[str, List]:
             return {"field": None, "values": [], "error": f"No shapefile found in: {shp_dir}"}
         
         shp_path = shp_files[0]
-        
-        # Load shapefile
-        gdf = gpd.read_file(shp_path)
-        
-        # Get the default field for this shapefile
-        field_name = get_default_field(boundary_source)
-        
-        # Verify field exists, otherwise try to find a suitable one
-        if field_name not in gdf.columns:
-            available_fields = get_shapefile_fields(boundary_source)
-            # Prefer NAME-like fields for display
-            name_fields = [f for f in available_fields if 'NAME' in f.upper()]
-            if name_fields:
-                field_name = name_fields[0]
-            elif available_fields:
-                field_name = available_fields[0]
-            else:
-                return {"field": None, "values": [], "error": f"No valid fields found in shapefile"}
-        
-        # Extract unique values and sort
-        unique_values = gdf[field_name].dropna().unique()
-        
-        # Convert to appropriate type and sort
-        # Try numeric first
-        try:
-            unique_values = sorted([int(v) for v in unique_values])
-        except (ValueError, TypeError):
-            # Fall back to string sorting
-            unique_values = sorted(str(v) for v in unique_values)
-        
-        return {
-            "field": field_name,
-            "values": unique_values,
-            "count": len(unique_values)
-        }
+        return _load_zone_values(str(shp_path), shp_path.stat().st_mtime, boundary_source)
         
     except Exception as e:
         return {"field": None, "values": [], "error": str(e)}
 
 
+@st.cache_data(show_spinner=False)
+def _load_zone_values(shp_path: str, mtime: float, boundary_source: str) -> Dict[str, List]:
+    """Read the zone field of a shapefile (cached until the file changes)."""
+    import pyogrio
+    from operations.config import get_shapefile_fields, get_default_field
+    
+    # Field names come from the layer metadata, without reading any features
+    columns = set(pyogrio.read_info(shp_path)['fields'])
+    
+    # Get the default field for this shapefile
+    field_name = get_default_field(boundary_source)
+    
+    # Verify field exists, otherwise try to find a suitable one
+    if field_name not in columns:
+        available_fields = get_shapefile_fields(boundary_source)
+        # Prefer NAME-like fields for display
+        name_fields = [f for f in available_fields if 'NAME' in f.upper()]
+        if name_fields:
+            field_name = name_fields[0]
+        elif available_fields:
+            field_name = available_fields[0]
+        else:
+            return {"field": None, "values": [], "error": f"No valid fields found in shapefile"}
+    
+    # Only decode the zone field: no geometries or other attributes
+    zones = pyogrio.read_dataframe(shp_path, columns=[field_name], read_geometry=False)
+    
+    values = zones[field_name].dropna()
+    
+    # Convert to appropriate type and sort
+    # Try numeric first (whole column at once)
+    numeric = pd.to_numeric(values, errors='coerce')
+    if numeric.notna().all():
+        unique_values = np.sort(numeric.astype('int64').unique()).tolist()
+    else:
+        # Fall back to string sorting
+        unique_values = np.sort(values.astype(str).unique()).tolist()
+    
+    return {
+        "field": field_name,
+        "values": unique_values,
+        "count": len(unique_values)
+    }
+
+
 def save_filter_config(config_dict: Dict) -> None:
     """Save filter configuration to JSON file."""
     try:
@@ -3,11 +3,111 @@ Simplified Web UI using Operation Registry
 Complete sidebar for time filters and data source selection
 """
 
+import traceback
 import streamlit as st
 from operations.registry import registry
 from analysis_engine import DataAnalysisEngine as DataEngine
+from config import Config
 from ui_helpers import constants
 
+# Selectbox options and labels, built once at import instead of on every rerun
+_DATA_SOURCE_LABELS = {"both": "Both", "snapp": "Snapp", "tapsi": "Tapsi"}
+_DATA_SOURCE_KEYS = tuple(_DATA_SOURCE_LABELS)
+_FILTER_TYPE_KEYS = tuple(constants.FILTER_TYPE_LABELS)
+_MONTH_KEYS = tuple(constants.PERSIAN_MONTHS)
+_MONTH_ALL_LABELS = {k: f"{k} - {v}" for k, v in constants.PERSIAN_MONTHS.items()}
+_SEASON_KEYS = tuple(constants.PERSIAN_SEASONS)
+
+
+@st.cache_resource
+def _load_registry():
+    """Snapshot of registered operations (instances), non-empty categories and
+    bound run methods, built once per process"""
+    operations = registry.get_all_operations()
+    non_empty_categories = tuple(
+        (k, tuple(v)) for k, v in registry.get_categories().items() if v
+    )
+    run_by_key = {k: op.run for k, op in operations.items()}
+    return operations, non_empty_categories, run_by_key
+
+
+@st.cache_resource
+def _load_metadata(_ops):
+    """Ready-to-render button label/help/key per operation key (underscore arg: not hashed)"""
+    metadata_by_key = {}
+    for k, op in _ops.items():
+        m = op.get_metadata()
+        metadata_by_key[k] = {
+            'label': f"**{m['title']}**",
+            'help': m.get('description', ''),
+            'btn_key': f"op_btn_{k}",
+        }
+    return metadata_by_key
+
+
+def _set_if_changed(key, value):
+    """Write a session_state value only when it actually changed"""
+    ss = st.session_state
+    current = ss.get(key)
+    if current is not value and current != value:
+        ss[key] = value
+
+
+def _render_specific_month():
+    """Year + month inputs for the specific_month filter"""
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        year = st.text_input("Year", value="1404", key="year_input", label_visibility="collapsed", placeholder="Year")
+    with col2:
+        month = st.selectbox(
+            "Month", 
+            options=_MONTH_KEYS,
+            key="month_select",
+            label_visibility="collapsed"
+        )
+    return {"year": year, "month": month}
+
+
+def _render_year():
+    """Year input for the year filter"""
+    year = st.text_input("Year", value="1404", key="year_input_y", label_visibility="collapsed", placeholder="Year")
+    return {"year": year}
+
+
+def _render_season():
+    """Year + season inputs for the season filter"""
+    year = st.text_input("Year", value="1404", key="year_input_s", label_visibility="collapsed", placeholder="Year")
+    season = st.selectbox(
+        "Season",
+        options=_SEASON_KEYS,
+        format_func=constants.PERSIAN_SEASONS.__getitem__,
+        key="season_select",
+        label_visibility="collapsed"
+    )
+    return {"year": year, "season": season}
+
+
+def _render_month_all_years():
+    """Month input for the month_all_years filter"""
+    month = st.selectbox(
+        "Month",
+        options=_MONTH_KEYS,
+        format_func=_MONTH_ALL_LABELS.__getitem__,
+        key="month_all_select",
+        label_visibility="collapsed"
+    )
+    return {"month": month}
+
+
+# Filter type -> widget renderer returning the time filter params
+_FILTER_HANDLERS = {
+    "specific_month": _render_specific_month,
+    "year": _render_year,
+    "season": _render_season,
+    "month_all_years": _render_month_all_years,
+}
+
+
 # Page config
 st.set_page_config(
     page_title="Data Analysis Tool",
@@ -17,75 +117,45 @@ st.set_page_config(
 
 # Initialize engine
 if 'engine' not in st.session_state:
-    from config import Config
-    config = Config()
-    st.session_state.engine = DataEngine(config=config)
+    st.session_state.engine = DataEngine(config=Config())
 
 # SIDEBAR - Compact Filters
 with st.sidebar:
-    # Data Source (compact)
-    st.markdown("**📂 Data Source**")
-    data_source = st.radio(
-        "Source:",
-        options=["both", "snapp", "tapsi"],
-        format_func=lambda x: {"both": "Both", "snapp": "Snapp", "tapsi": "Tapsi"}[x],
-        horizontal=True,
-        key="data_source_select",
-        label_visibility="collapsed"
-    )
-    st.session_state.data_source = data_source
-    
-    st.divider()
-    
-    # Time Filter (compact)
+    # Time Filter (compact). The type selector stays outside the form so the
+    # inputs below switch as soon as a different type is picked.
     st.markdown("**📅 Time Filter**")
     filter_type = st.selectbox(
         "Type:",
-        options=list(constants.FILTER_TYPE_LABELS.keys()),
-        format_func=lambda x: constants.FILTER_TYPE_LABELS[x],
+        options=_FILTER_TYPE_KEYS,
+        format_func=constants.FILTER_TYPE_LABELS.__getitem__,
         key="filter_type_select",
         label_visibility="collapsed"
     )
-    st.session_state.filter_type = filter_type
     
-    params = {}
-    if filter_type == "specific_month":
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            year = st.text_input("Year", value="1404", key="year_input", label_visibility="collapsed", placeholder="Year")
-        with col2:
-            month = st.selectbox(
-                "Month", 
-                options=list(constants.PERSIAN_MONTHS.keys()),
-                format_func=lambda x: f"{x}",
-                key="month_select",
-                label_visibility="collapsed"
-            )
-        params = {"year": year, "month": month}
-    elif filter_type == "year":
-        year = st.text_input("Year", value="1404", key="year_input_y", label_visibility="collapsed", placeholder="Year")
-        params = {"year": year}
-    elif filter_type == "season":
-        year = st.text_input("Year", value="1404", key="year_input_s", label_visibility="collapsed", placeholder="Year")
-        season = st.selectbox(
-            "Season",
-            options=list(constants.PERSIAN_SEASONS.keys()),
-            format_func=lambda x: constants.PERSIAN_SEASONS[x],
-            key="season_select",
-            label_visibility="collapsed"
-        )
-        params = {"year": year, "season": season}
-    elif filter_type == "month_all_years":
-        month = st.selectbox(
-            "Month",
-            options=list(constants.PERSIAN_MONTHS.keys()),
-            format_func=lambda x: f"{x} - {constants.PERSIAN_MONTHS[x]}",
-            key="month_all_select",
+    # Filter inputs are batched in a form: no rerun until "Apply Filters"
+    with st.form("filters", clear_on_submit=False):
+        params = _FILTER_HANDLERS.get(filter_type, dict)()
+        
+        st.divider()
+        
+        # Data Source (compact)
+        st.markdown("**📂 Data Source**")
+        data_source = st.radio(
+            "Source:",
+            options=_DATA_SOURCE_KEYS,
+            format_func=_DATA_SOURCE_LABELS.__getitem__,
+            horizontal=True,
+            key="data_source_select",
             label_visibility="collapsed"
         )
-        params = {"month": month}
+        
+        submitted = st.form_submit_button("Apply Filters", use_container_width=True)
     
-    st.session_state.time_filter_params = params
+    # Apply on submit; the first run seeds the widget defaults
+    if submitted or 'time_filter_params' not in st.session_state:
+        _set_if_changed("data_source", data_source)
+        _set_if_changed("filter_type", filter_type)
+        _set_if_changed("time_filter_params", params)
     
     st.divider()
     st.caption("📊 v3.0")
@@ -97,47 +167,83 @@ st.title("📊 Data Analysis Tool")
 if 'selected_operation' not in st.session_state:
     st.session_state.selected_operation = None
 
-# Category metadata
-CATEGORY_INFO = {
-    'filters': {'emoji': '🔍', 'title': 'Filters', 'description': 'Filter and slice your data'},
-    'transforms': {'emoji': '🔄', 'title': 'Transforms', 'description': 'Transform and aggregate data'},
-    'joins': {'emoji': '🔗', 'title': 'Joins & Matrices', 'description': 'Join data and create matrices'},
-    'utilities': {'emoji': '🛠️', 'title': 'Utilities', 'description': 'Helpful tools'}
+# Category metadata: (emoji, title, description)
+_CATEGORY_INFO = {
+    'filters': ('🔍', 'Filters', 'Filter and slice your data'),
+    'transforms': ('🔄', 'Transforms', 'Transform and aggregate data'),
+    'joins': ('🔗', 'Joins & Matrices', 'Join data and create matrices'),
+    'utilities': ('🛠️', 'Utilities', 'Helpful tools')
 }
 
-# Get operations from registry
-operations = registry.get_all_operations()
-categories = registry.get_categories()
 
-# Render main content
-if st.session_state.selected_operation:
-    try:
-        # Get operation from registry
-        operation = registry.get_operation(st.session_state.selected_operation)
-        
-        # Add back button
-        if st.button("⬅️ Back to Operations", key="back_button"):
-            st.session_state.selected_operation = None
-            st.rerun()
+def _render_welcome(non_empty_categories, metadata_by_key):
+    """Render operation buttons grouped by category (locals keep the loop on fast lookups)"""
+    _meta = metadata_by_key
+    _button = st.button
+    _ss = st.session_state
+    _rerun = st.rerun
+    _markdown = st.markdown
+    
+    for category_key, category_ops in non_empty_categories:
+        emoji, title, description = (
+            _CATEGORY_INFO.get(category_key) or ('📦', category_key.title(), '')
+        )
         
-        st.markdown("---")
+        st.subheader(f"{emoji} {title}")
+        st.caption(description)
         
-        # Run operation (renders UI and executes if requested)
-        operation.run()
+        # Create columns for operation buttons (up to 3 per row)
+        n = min(3, len(category_ops))
+        cols = st.columns(n)
+        for idx, op_key in enumerate(category_ops):
+            entry = _meta[op_key]
+            
+            col_idx = idx % n
+            with cols[col_idx]:
+                if _button(
+                    entry['label'],
+                    key=entry['btn_key'],
+                    help=entry['help'],
+                    use_container_width=True
+                ):
+                    _ss.selected_operation = op_key
+                    _rerun()
         
-    except KeyError:
-        st.error(f"❌ Operation '{st.session_state.selected_operation}' not found in registry")
-        if st.button("⬅️ Back to Operations"):
-            st.session_state.selected_operation = None
-            st.rerun()
-    except Exception as e:
-        st.error(f"❌ Error running operation: {e}")
-        import traceback
-        with st.expander("Debug Info"):
-            st.code(traceback.format_exc())
-        if st.button("⬅️ Back to Operations"):
-            st.session_state.selected_operation = None
-            st.rerun()
+        _markdown("---")
+
+
+# Get operations from registry (operations are registered once, at import)
+operations, non_empty_categories, run_by_key = _load_registry()
+metadata_by_key = _load_metadata(operations)
+
+# Render main content
+if st.session_state.selected_operation:
+    # Single back button, shared by the normal and error paths
+    if st.button("⬅️ Back to Operations", key="back_button"):
+        st.session_state.selected_operation = None
+        st.rerun()
+    
+    st.markdown("---")
+    
+    # Get the operation's run method from the cached registry snapshot
+    run = run_by_key.get(st.session_state.selected_operation)
+    error_msg = None
+    trace = None
+    if run is None:
+        error_msg = f"❌ Operation '{st.session_state.selected_operation}' not found in registry"
+    else:
+        try:
+            # Run operation (renders UI and executes if requested)
+            run()
+        except Exception as e:
+            error_msg = f"❌ Error running operation: {e}"
+            trace = traceback.format_exc()
+    
+    if error_msg:
+        st.error(error_msg)
+        if trace:
+            with st.expander("Debug Info"):
+                st.code(trace)
 else:
     # Welcome screen
     st.markdown("""
@@ -146,6 +252,7 @@ else:
     **Step 1:** Configure global filters in the left sidebar
     - 📂 Select data source (Snapp/Tapsi/Both)
     - 📅 Set time filters (month, year, season, etc.)
+    - ✅ Click **Apply Filters** to use them
     
     **Step 2:** Choose an operation from below
     """)
@@ -153,31 +260,4 @@ else:
     st.markdown("---")
     
     # Render operations by category
-    for category_key, category_ops in categories.items():
-        if category_ops:  # Only show non-empty categories
-            category_meta = CATEGORY_INFO.get(category_key, {})
-            emoji = category_meta.get('emoji', '📦')
-            title = category_meta.get('title', category_key.title())
-            description = category_meta.get('description', '')
-            
-            st.subheader(f"{emoji} {title}")
-            st.caption(description)
-            
-            # Create columns for operation buttons (3 per row)
-            cols = st.columns(3)
-            for idx, op_key in enumerate(category_ops):
-                op = operations[op_key]
-                metadata = op.get_metadata()
-                
-                col_idx = idx % 3
-                with cols[col_idx]:
-                    if st.button(
-                        f"**{metadata['title']}**",
-                        key=f"op_btn_{op_key}",
-                        help=metadata.get('description', ''),
-                        use_container_width=True
-                    ):
-                        st.session_state.selected_operation = op_key
-                        st.rerun()
-            
-            st.markdown("---")
+    _render_welcome(non_empty_categories, metadata_by_key)